@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""بنچمارک سرویس اسکن: تأخیر درخواست‌ها و توان توزیع نتایج بین کلاینت‌ها
+
+برای مستقل بودن از شبکه، به جای پینگ و جستجوی DNS واقعی از پروب و نام‌های
+شبیه‌سازی‌شده استفاده می‌شود.
+
+نمونه اجرا:
+    python bench_scan_service.py --clients 32 --fan-out-target 10.1.0.0/20
+"""
+
+import sys
+import time
+import argparse
+import statistics
+import threading
+
+from scan_service import ScanService, ScanServiceClient, ScanServiceServer
+
+def fake_probe(delay, active_every):
+    """پروب شبیه‌سازی‌شده: هر active_every آدرس یکی فعال است"""
+    def probe(ip):
+        time.sleep(delay)
+        return int(ip.rsplit('.', 1)[1]) % active_every == 0
+    return probe
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def bench_submit_latency(client, target, requests):
+    """تأخیر درخواست‌های تکراری که با اسکن در حال اجرا ادغام یا از حافظه نهان پاسخ داده می‌شوند"""
+    latencies = []
+    kinds = {"new": 0, "coalesced": 0, "cached": 0}
+    for _ in range(requests):
+        started = time.perf_counter()
+        reply = client.submit([target])
+        latencies.append((time.perf_counter() - started) * 1000)
+        kind = "cached" if reply["cached"] else "coalesced" if reply["coalesced"] else "new"
+        kinds[kind] += 1
+    return reply["id"], latencies, kinds
+
+def bench_fan_out(client, job_id, clients):
+    """چند کلاینت هم‌زمان جریان رویدادهای یک اسکن را تا پایان دریافت می‌کنند"""
+    counts = [0] * clients
+    barrier = threading.Barrier(clients + 1)
+
+    def consume(index):
+        barrier.wait()
+        for _ in client.events(job_id):
+            counts[index] += 1
+
+    threads = [threading.Thread(target=consume, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return sum(counts), time.perf_counter() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک سرویس اسکن")
+    parser.add_argument("--target", default="10.0.0.0/22")
+    parser.add_argument("--fan-out-target", default="10.1.0.0/20")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--probe-delay", type=float, default=0.002)
+    parser.add_argument("--active-every", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    service = ScanService(threads=args.threads, probe=fake_probe(args.probe_delay, args.active_every),
+                          resolve=lambda ip: f"host-{ip.replace('.', '-')}", log=lambda message: None)
+    server = ScanServiceServer(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ScanServiceClient(f"http://127.0.0.1:{server.server_address[1]}")
+
+    try:
+        _, latencies, kinds = bench_submit_latency(client, args.target, args.requests)
+        print(f"درخواست‌های ثبت اسکن ({args.requests} عدد): "
+              f"میانگین {statistics.mean(latencies):.2f}ms، "
+              f"p50 {percentile(latencies, 0.50):.2f}ms، p95 {percentile(latencies, 0.95):.2f}ms، "
+              f"بیشینه {max(latencies):.2f}ms")
+        print(f"  جدید: {kinds['new']}، ادغام‌شده: {kinds['coalesced']}، از حافظه نهان: {kinds['cached']}")
+
+        # اسکن جدید که کلاینت‌ها هم‌زمان با اجرای آن رویدادها را دریافت می‌کنند
+        job_id = client.submit([args.fan_out_target])["id"]
+        events, elapsed = bench_fan_out(client, job_id, args.clients)
+        print(f"توزیع زنده به {args.clients} کلاینت: {events} رویداد در {elapsed:.2f}s "
+              f"({events / elapsed:.0f} رویداد در ثانیه)")
+
+        # اسکن اکنون تمام شده و کلاینت‌ها همه رویدادها را از حافظه نهان دریافت می‌کنند
+        events, elapsed = bench_fan_out(client, job_id, args.clients)
+        print(f"توزیع از حافظه نهان به {args.clients} کلاینت: {events} رویداد در {elapsed:.2f}s "
+              f"({events / elapsed:.0f} رویداد در ثانیه)")
+    finally:
+        service.shutdown()
+        server.shutdown()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
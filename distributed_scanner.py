@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""اسکن توزیع‌شده با یک هماهنگ‌کننده و چند عامل اسکن
+
+هماهنگ‌کننده فضای هدف را به اجاره‌های (lease) کوچک تقسیم می‌کند و از طریق یک
+پروتکل ساده TCP (هر پیام یک خط JSON) آن‌ها را به عامل‌ها می‌دهد. عامل‌ها هر
+اجاره را با هسته مشترک اسکن می‌کنند و میزبان‌های فعال را به صورت دسته‌ای و
+فشرده برمی‌گردانند. اگر عاملی قطع شود یا در مهلت مقرر ضربان (heartbeat)
+نفرستد، اجاره‌های آن دوباره صادر می‌شوند.
+
+نمونه اجرا:
+    python distributed_scanner.py coordinator --target 192.168.0.0/22
+    python distributed_scanner.py agent --host 127.0.0.1 --threads 20
+
+پیام‌ها (کلید t نوع پیام است):
+    عامل ← {"t": "hello", "name": ..., "threads": ...}
+    عامل ← {"t": "next"}                      درخواست اجاره بعدی
+    هماهنگ‌کننده → {"t": "lease", "id": ..., "a": ..., "b": ...}
+    هماهنگ‌کننده → {"t": "wait", "s": ...} یا {"t": "done"}
+    عامل ← {"t": "r", "id": ..., "h": [[ip, hostname], ...]}
+    عامل ← {"t": "hb", "id": ...} و {"t": "c", "id": ...}
+
+آدرس‌ها به صورت عدد صحیح و نام ناشناس به صورت رشته خالی ارسال می‌شوند.
+"""
+
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import ipaddress
+import socketserver
+from collections import deque
+
+from scanner_core import UNKNOWN_HOSTNAME, ip_range, parse_target, ping_ip, scan_ips
+
+DEFAULT_PORT = 9750
+DEFAULT_LEASE_SIZE = 256
+
+def send_message(wfile, message, lock=None):
+    """ارسال یک پیام JSON در یک خط"""
+    data = (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+    if lock is None:
+        wfile.write(data)
+        wfile.flush()
+        return
+    with lock:
+        wfile.write(data)
+        wfile.flush()
+
+def read_message(rfile):
+    """خواندن یک پیام JSON؛ در صورت بسته شدن اتصال None برمی‌گرداند"""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+def split_targets(targets, lease_size=DEFAULT_LEASE_SIZE):
+    """تقسیم هدف‌ها (CIDR، بازه a-b یا یک IP) به بازه‌های عددی حداکثر lease_size تایی"""
+    chunks = []
+    for target in targets:
+        first, last = parse_target(target)
+        for chunk_start in range(first, last + 1, lease_size):
+            chunks.append((chunk_start, min(chunk_start + lease_size - 1, last)))
+    return chunks
+
+class Lease:
+    """یک بخش از فضای هدف که به یک عامل سپرده می‌شود"""
+
+    def __init__(self, lease_id, first, last):
+        self.id = lease_id
+        self.first = first
+        self.last = last
+        self.agent = None
+        self.deadline = 0.0
+        self.attempts = 0
+
+    def __len__(self):
+        return self.last - self.first + 1
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    """مدیریت اتصال یک عامل در سمت هماهنگ‌کننده"""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        agent = f"{self.client_address[0]}:{self.client_address[1]}"
+        try:
+            hello = read_message(self.rfile)
+            if not isinstance(hello, dict) or hello.get("t") != "hello":
+                return
+            agent = f"{hello.get('name') or 'agent'}@{agent}"
+            coordinator.log(f"عامل متصل شد: {agent} ({hello.get('threads')} ترد)")
+
+            while True:
+                message = read_message(self.rfile)
+                if message is None:
+                    break
+                if not isinstance(message, dict):
+                    continue  # پیام نامعتبر نادیده گرفته می‌شود
+                reply = coordinator.handle_message(agent, message)
+                if reply is not None:
+                    send_message(self.wfile, reply)
+        except (OSError, ValueError, TypeError) as e:
+            coordinator.log(f"خطا در ارتباط با عامل {agent}: {e}")
+        finally:
+            coordinator.release_agent(agent)
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class Coordinator:
+    """تقسیم فضای هدف به اجاره‌ها و جمع‌آوری نتایج عامل‌ها"""
+
+    def __init__(self, targets, lease_size=DEFAULT_LEASE_SIZE, host="127.0.0.1",
+                 port=DEFAULT_PORT, lease_timeout=30.0, on_result=None, log=print):
+        self.lease_timeout = lease_timeout
+        self.on_result = on_result
+        self.log = log
+
+        self.leases = [Lease(i, first, last)
+                       for i, (first, last) in enumerate(split_targets(targets, lease_size))]
+        self.total_ips = sum(len(lease) for lease in self.leases)
+        self.pending = deque(self.leases)
+        self.active = {}
+        self.completed = set()
+        self.results = {}
+
+        self.lock = threading.Lock()
+        self.done_event = threading.Event()
+        if not self.leases:
+            self.done_event.set()
+
+        self.server = _Server((host, port), _AgentHandler, bind_and_activate=True)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+
+    def start(self):
+        """شروع پذیرش عامل‌ها و بررسی مهلت اجاره‌ها در تردهای جداگانه"""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._reap_expired, daemon=True).start()
+        self.log(f"هماهنگ‌کننده روی {self.address[0]}:{self.address[1]} آماده است - "
+                 f"{len(self.leases)} اجاره، {self.total_ips} آدرس")
+
+    def wait(self, timeout=None):
+        """انتظار تا اتمام همه اجاره‌ها"""
+        return self.done_event.wait(timeout)
+
+    def shutdown(self):
+        """توقف سرور هماهنگ‌کننده"""
+        self.done_event.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def progress(self):
+        """درصد آدرس‌های اسکن‌شده"""
+        with self.lock:
+            done = sum(len(self.leases[i]) for i in self.completed)
+        return (done / self.total_ips) * 100 if self.total_ips else 100.0
+
+    def handle_message(self, agent, message):
+        """پردازش یک پیام عامل؛ در صورت نیاز پاسخ برمی‌گرداند"""
+        kind = message.get("t")
+        if kind == "next":
+            return self._assign(agent)
+        if kind == "r":
+            hosts = message.get("h")
+            self._merge_results(hosts if isinstance(hosts, list) else [])
+            self._touch(agent, message.get("id"))
+        elif kind == "hb":
+            self._touch(agent, message.get("id"))
+        elif kind == "c":
+            self._complete(agent, message.get("id"))
+        return None
+
+    def release_agent(self, agent):
+        """بازگرداندن اجاره‌های یک عامل قطع‌شده به صف"""
+        with self.lock:
+            orphaned = [lease for lease in self.active.values() if lease.agent == agent]
+            for lease in orphaned:
+                self._requeue(lease)
+        if orphaned:
+            self.log(f"عامل {agent} قطع شد - {len(orphaned)} اجاره دوباره صادر می‌شود")
+        else:
+            self.log(f"عامل {agent} قطع شد")
+
+    def _assign(self, agent):
+        with self.lock:
+            if self.done_event.is_set():
+                return {"t": "done"}
+            if not self.pending:
+                return {"t": "wait", "s": 1.0}
+            lease = self.pending.popleft()
+            lease.agent = agent
+            lease.attempts += 1
+            lease.deadline = time.monotonic() + self.lease_timeout
+            self.active[lease.id] = lease
+        return {"t": "lease", "id": lease.id, "a": lease.first, "b": lease.last}
+
+    def _touch(self, agent, lease_id):
+        with self.lock:
+            lease = self.active.get(lease_id)
+            if lease is not None and lease.agent == agent:
+                lease.deadline = time.monotonic() + self.lease_timeout
+
+    def _complete(self, agent, lease_id):
+        with self.lock:
+            lease = self.active.get(lease_id)
+            # اجاره‌ای که در این فاصله دوباره صادر شده، متعلق به عامل جدید است
+            if lease is None or lease.agent != agent:
+                return
+            del self.active[lease_id]
+            self.completed.add(lease_id)
+            finished = len(self.completed) == len(self.leases)
+        if finished:
+            self.log("همه اجاره‌ها به پایان رسید")
+            self.done_event.set()
+
+    def _merge_results(self, hosts):
+        new_hosts = []
+        with self.lock:
+            for host in hosts:
+                # هر نتیجه باید یک جفت [آدرس عددی، نام] باشد؛ بقیه نادیده گرفته می‌شوند
+                if not isinstance(host, list) or len(host) != 2:
+                    continue
+                ip_value, hostname = host
+                if (not isinstance(ip_value, int) or isinstance(ip_value, bool)
+                        or not isinstance(hostname, str) or not 0 <= ip_value <= 0xFFFFFFFF):
+                    continue
+                ip = str(ipaddress.IPv4Address(ip_value))
+                hostname = hostname or UNKNOWN_HOSTNAME
+                if ip not in self.results:
+                    new_hosts.append((ip, hostname))
+                self.results[ip] = hostname
+        if self.on_result:
+            for ip, hostname in new_hosts:
+                self.on_result(ip, hostname)
+
+    def _requeue(self, lease):
+        # باید با قفل گرفته‌شده فراخوانی شود
+        self.active.pop(lease.id, None)
+        lease.agent = None
+        self.pending.appendleft(lease)
+
+    def _reap_expired(self):
+        while not self.done_event.is_set():
+            now = time.monotonic()
+            with self.lock:
+                expired = [lease for lease in self.active.values() if lease.deadline < now]
+                for lease in expired:
+                    self._requeue(lease)
+            for lease in expired:
+                self.log(f"مهلت اجاره {lease.id} به پایان رسید - دوباره صادر می‌شود")
+            self.done_event.wait(1.0)
+
+class ScanAgent:
+    """عامل سبک اسکن که اجاره‌ها را از هماهنگ‌کننده می‌گیرد و اسکن می‌کند"""
+
+    def __init__(self, host, port=DEFAULT_PORT, threads=20, name=None, batch_size=32,
+                 heartbeat_interval=5.0, probe=ping_ip, log=print):
+        self.host = host
+        self.port = port
+        self.threads = threads
+        self.name = name or socket.gethostname()
+        self.batch_size = batch_size
+        self.heartbeat_interval = heartbeat_interval
+        self.probe = probe
+        self.log = log
+
+        self.stop_event = threading.Event()
+        self.send_lock = threading.Lock()
+        self.buffer_lock = threading.Lock()
+        self.buffer = []
+        self.current_lease = None
+        self.wfile = None
+
+    def stop(self):
+        """توقف عامل پس از اتمام آدرس‌های در حال اسکن"""
+        self.stop_event.set()
+
+    def run(self):
+        """اتصال به هماهنگ‌کننده و اسکن اجاره‌ها تا پایان کار"""
+        with socket.create_connection((self.host, self.port)) as sock:
+            rfile = sock.makefile('rb')
+            self.wfile = sock.makefile('wb')
+            self._send({"t": "hello", "name": self.name, "threads": self.threads})
+            threading.Thread(target=self._heartbeat, daemon=True).start()
+
+            try:
+                while not self.stop_event.is_set():
+                    self._send({"t": "next"})
+                    reply = read_message(rfile)
+                    if reply is None or reply.get("t") == "done":
+                        break
+                    if reply.get("t") == "wait":
+                        self.stop_event.wait(reply.get("s", 1.0))
+                        continue
+                    self._scan_lease(reply["id"], reply["a"], reply["b"])
+            finally:
+                self.stop_event.set()
+                # بستن صریح اتصال، تا هماهنگ‌کننده فوراً اجاره‌های این عامل را دوباره صادر کند
+                with self.send_lock:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass  # اتصال از قبل بسته شده است
+                    rfile.close()
+                    self.wfile.close()
+
+    def _scan_lease(self, lease_id, first, last):
+        self.current_lease = lease_id
+        scan_ips(ip_range(first, last), self.threads,
+                 on_result=self._buffer_result,
+                 should_continue=lambda: not self.stop_event.is_set(),
+                 probe=self.probe)
+        self._flush()
+        self.current_lease = None
+        if not self.stop_event.is_set():
+            self._send({"t": "c", "id": lease_id})
+
+    def _buffer_result(self, ip, hostname):
+        with self.buffer_lock:
+            self.buffer.append([int(ipaddress.IPv4Address(ip)),
+                                "" if hostname == UNKNOWN_HOSTNAME else hostname])
+            full = len(self.buffer) >= self.batch_size
+        if full:
+            self._flush()
+
+    def _flush(self):
+        with self.buffer_lock:
+            hosts, self.buffer = self.buffer, []
+        if hosts:
+            self._send({"t": "r", "id": self.current_lease, "h": hosts})
+
+    def _heartbeat(self):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            lease_id = self.current_lease
+            if lease_id is None:
+                continue
+            try:
+                self._flush()
+                self._send({"t": "hb", "id": lease_id})
+            except (OSError, ValueError):
+                break  # اتصال بسته شده است
+
+    def _send(self, message):
+        send_message(self.wfile, message, self.send_lock)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="اسکن توزیع‌شده شبکه IP")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator_parser = commands.add_parser("coordinator", help="اجرای هماهنگ‌کننده")
+    coordinator_parser.add_argument("--target", action="append", required=True,
+                                    help="هدف اسکن: CIDR، بازه a-b یا یک IP (قابل تکرار)")
+    coordinator_parser.add_argument("--bind", default="127.0.0.1")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument("--lease-size", type=int, default=DEFAULT_LEASE_SIZE)
+    coordinator_parser.add_argument("--lease-timeout", type=float, default=30.0)
+
+    agent_parser = commands.add_parser("agent", help="اجرای عامل اسکن")
+    agent_parser.add_argument("--host", default="127.0.0.1")
+    agent_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    agent_parser.add_argument("--threads", type=int, default=20)
+    agent_parser.add_argument("--name")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "agent":
+        agent = ScanAgent(args.host, args.port, threads=args.threads, name=args.name)
+        try:
+            agent.run()
+        except KeyboardInterrupt:
+            agent.stop()
+        except OSError as e:
+            print(f"خطا در اتصال به هماهنگ‌کننده: {e}")
+            return 1
+        return 0
+
+    coordinator = Coordinator(args.target, lease_size=args.lease_size, host=args.bind,
+                              port=args.port, lease_timeout=args.lease_timeout,
+                              on_result=lambda ip, hostname: print(f"IP فعال یافت شد: {ip} ({hostname})"))
+    coordinator.start()
+    try:
+        while not coordinator.wait(5.0):
+            print(f"پیشرفت: {coordinator.progress():.1f}%")
+    except KeyboardInterrupt:
+        print("اسکن توسط کاربر متوقف شد")
+    finally:
+        coordinator.shutdown()
+
+    print(f"اسکن به پایان رسید. تعداد {len(coordinator.results)} IP فعال یافت شد.")
+    for ip in sorted(coordinator.results, key=ipaddress.IPv4Address):
+        print(f"{ip}\t{coordinator.results[ip]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import sys
-import socket
-import subprocess
 import threading
 import time
 from datetime import datetime
@@ -18,38 +17,11 @@ except ImportError:
     print("pip install tk")
     sys.exit(1)
 
-def get_local_ip():
-    """گرفتن آدرس IP لوکال دستگاه کاربر"""
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        local_ip = s.getsockname()[0]
-        s.close()
-        return local_ip
-    except Exception:
-        return None
-
-def ping_ip(ip):
-    """پینگ کردن یک آدرس IP برای بررسی فعال بودن آن"""
-    try:
-        if sys.platform.startswith('win'):
-            # دستور پینگ در ویندوز
-            output = subprocess.run(['ping', '-n', '1', '-w', '500', ip], 
-                                stdout=subprocess.PIPE, 
-                                stderr=subprocess.PIPE,
-                                text=True,
-                                timeout=1)
-        else:
-            # دستور پینگ در لینوکس/مک
-            output = subprocess.run(['ping', '-c', '1', '-W', '1', ip], 
-                                stdout=subprocess.PIPE, 
-                                stderr=subprocess.PIPE,
-                                text=True,
-                                timeout=1)
-        
-        return output.returncode == 0
-    except (subprocess.SubprocessError, subprocess.TimeoutExpired):
-        return False
+from scanner_core import UNKNOWN_HOSTNAME, get_local_ip, read_neighbour_table, resolve_hostname
+from name_discovery import discover_names
+from scan_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, ScanScheduler
+from oui_lookup import get_default_index, lookup_vendor
+from scan_service import ScanServiceClient
 
 # تعریف رنگ‌های تم تاریک
 DARK_BG = "#1E1E2D"
@@ -144,6 +116,17 @@ class DarkTheme:
                         foreground=TEXT_COLOR,
                         font=('Segoe UI', 11, 'bold'))
         
+        # استایل زبانه‌های نتایج
+        self.style.configure('TNotebook', background=CARD_BG, bordercolor=BORDER_COLOR)
+        self.style.configure('TNotebook.Tab', 
+                        background=PANEL_BG, 
+                        foreground=SECONDARY_TEXT,
+                        padding=(10, 4),
+                        font=('Segoe UI', 9))
+        self.style.map('TNotebook.Tab',
+                   background=[('selected', ACCENT_COLOR)],
+                   foreground=[('selected', TEXT_COLOR)])
+        
         # استایل اسکرول‌بار
         self.style.configure('TScrollbar', 
                         background=DARK_BG, 
@@ -151,11 +134,89 @@ class DarkTheme:
                         bordercolor=BORDER_COLOR,
                         arrowcolor=TEXT_COLOR)
 
+# سطوح اولویت قابل انتخاب در رابط کاربری
+PRIORITY_LEVELS = {
+    "فوری": PRIORITY_INTERACTIVE,
+    "عادی": PRIORITY_NORMAL,
+    "پس‌زمینه": PRIORITY_BACKGROUND,
+}
+
+class JobView:
+    """نمای پیشرفت و نتایج یک اسکن در یک زبانه جداگانه"""
+    
+    def __init__(self, notebook, title):
+        self.title = title
+        self.job = None  # اسکن ثبت‌شده در زمان‌بند (برای اسکن محلی)
+        self.active_ips = []
+        self.items = {}  # ip -> شناسه ردیف در جدول
+        self.macs = {}  # ip -> آدرس MAC
+        self.mac_refreshing = False
+        self.reverse_dns = True
+        self.naming_started = False
+        self.is_scanning = True
+        self.status = "در حال اسکن..."
+        self.start_time = datetime.now()
+        self.end_time = None
+        
+        self.frame = ttk.Frame(notebook, padding=5)
+        
+        # نوار پیشرفت
+        self.progress_var = tk.DoubleVar(value=0.0)
+        progress_bar = ttk.Progressbar(self.frame, variable=self.progress_var, maximum=100)
+        progress_bar.pack(fill=tk.X, pady=(0, 10))
+        
+        # ایجاد یک کارت گرافیکی برای جدول نتایج
+        results_card = tk.Frame(self.frame, bg=CARD_BG, highlightbackground=BORDER_COLOR, 
+                            highlightthickness=1, padx=5, pady=5)
+        results_card.pack(fill=tk.BOTH, expand=True)
+        
+        # ساخت جدول
+        results_tree_frame = tk.Frame(results_card, bg=CARD_BG)
+        results_tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        columns = ("ip", "hostname", "mac", "vendor", "status")
+        self.results_tree = ttk.Treeview(results_tree_frame, columns=columns, show="headings")
+        
+        # تعریف ستون‌ها
+        self.results_tree.heading("ip", text="آدرس IP")
+        self.results_tree.heading("hostname", text="نام میزبان")
+        self.results_tree.heading("mac", text="آدرس MAC")
+        self.results_tree.heading("vendor", text="سازنده")
+        self.results_tree.heading("status", text="وضعیت")
+        
+        self.results_tree.column("ip", width=110)
+        self.results_tree.column("hostname", width=150)
+        self.results_tree.column("mac", width=130)
+        self.results_tree.column("vendor", width=150)
+        self.results_tree.column("status", width=70)
+        
+        # تنظیم رنگ و استایل برای تگ‌های مختلف
+        self.results_tree.tag_configure("active", background="#1E293B", foreground=SUCCESS_COLOR)
+        self.results_tree.tag_configure("inactive", background=DARKER_BG, foreground=SECONDARY_TEXT)
+        
+        # اسکرول بار برای جدول
+        tree_scroll = ttk.Scrollbar(results_tree_frame, orient="vertical", command=self.results_tree.yview)
+        self.results_tree.configure(yscrollcommand=tree_scroll.set)
+        
+        # قرار دادن جدول و اسکرول بار
+        self.results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        notebook.add(self.frame, text=title)
+        notebook.select(self.frame)
+    
+    def elapsed(self):
+        """زمان سپری‌شده اسکن به صورت ساعت:دقیقه:ثانیه"""
+        elapsed = (self.end_time or datetime.now()) - self.start_time
+        hours, remainder = divmod(elapsed.total_seconds(), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
+
 class IPScannerApp:
     def __init__(self, root):
         self.root = root
         self.root.title("IP Scanner | Dark Theme")
-        self.root.geometry("850x650")
+        self.root.geometry("950x720")
         self.root.resizable(True, True)
         self.root.configure(bg=DARK_BG)  # تنظیم رنگ پس‌زمینه اصلی
         
@@ -175,17 +236,33 @@ class IPScannerApp:
         self.theme = DarkTheme()
         
         # متغیرهای برنامه
-        self.active_ips = []
-        self.scan_thread = None
-        self.is_scanning = False
+        # همه اسکن‌ها از یک زمان‌بند با بودجه مشترک پروب استفاده می‌کنند
+        # نام میزبان‌ها پس از پروب به صورت دسته‌ای پیدا می‌شود، نه جداگانه برای هر پروب
+        # خطاهای تردهای زمان‌بند در لاگ فعالیت نمایش داده می‌شوند
+        self.scheduler = ScanScheduler(max_in_flight=20, resolve=lambda ip: UNKNOWN_HOSTNAME,
+                                       log=lambda message: self.root.after(0, lambda: self.log(message)))
+        self.job_views = {}
+        self.job_counter = 0
+        self.stats_ticks = 0
         self.local_ip = get_local_ip() or "127.0.0.1"
         self.ip_base = '.'.join(self.local_ip.split('.')[:3])
         
         # ایجاد ساختار رابط کاربری
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # شروع به‌روزرسانی دوره‌ای آمار
+        self.update_scan_time()
         
         # وضعیت اولیه
         self.log("برنامه اسکنر IP آماده است. لطفاً پارامترهای اسکن را تنظیم کنید و روی 'شروع اسکن' کلیک کنید.")
+        
+        # بارگذاری فهرست سازندگان کارت شبکه (در صورت وجود)
+        oui_index = get_default_index()
+        if oui_index is None:
+            self.log("فهرست سازندگان (oui.idx) یافت نشد؛ برای نمایش سازنده، آن را با oui_lookup.py بسازید.")
+        else:
+            self.log(f"فهرست سازندگان با {len(oui_index)} رکورد بارگذاری شد")
     
     def setup_ui(self):
         """ایجاد رابط کاربری برنامه با تم تاریک"""
@@ -307,6 +384,59 @@ class IPScannerApp:
                              relief='flat', highlightbackground=BORDER_COLOR, highlightthickness=1)
         threads_spin.pack(side=tk.LEFT, padx=5)
         
+        # نرخ پروب (مشترک بین همه اسکن‌ها)
+        rate_frame = tk.Frame(settings_container, bg=CARD_BG)
+        rate_frame.pack(fill=tk.X, pady=5)
+        
+        tk.Label(rate_frame, text="پروب در ثانیه (۰ = نامحدود):", bg=CARD_BG, fg=TEXT_COLOR,
+             font=('Segoe UI', 10)).pack(side=tk.RIGHT, padx=(0, 5))
+        
+        self.rate_var = tk.IntVar(value=0)
+        tk.Spinbox(rate_frame, from_=0, to=1000, textvariable=self.rate_var, width=5,
+               bg=DARKER_BG, fg=TEXT_COLOR, buttonbackground=PANEL_BG,
+               relief='flat', highlightbackground=BORDER_COLOR, highlightthickness=1).pack(side=tk.LEFT, padx=5)
+        
+        # اولویت و سهم اسکن جدید
+        priority_frame = tk.Frame(settings_container, bg=CARD_BG)
+        priority_frame.pack(fill=tk.X, pady=5)
+        
+        tk.Label(priority_frame, text="اولویت:", bg=CARD_BG, fg=TEXT_COLOR,
+             font=('Segoe UI', 10)).pack(side=tk.RIGHT, padx=(0, 5))
+        
+        self.priority_var = tk.StringVar(value="عادی")
+        ttk.Combobox(priority_frame, textvariable=self.priority_var, values=list(PRIORITY_LEVELS),
+                 state="readonly", width=9).pack(side=tk.RIGHT, padx=5)
+        
+        self.weight_var = tk.IntVar(value=1)
+        tk.Spinbox(priority_frame, from_=1, to=10, textvariable=self.weight_var, width=3,
+               bg=DARKER_BG, fg=TEXT_COLOR, buttonbackground=PANEL_BG,
+               relief='flat', highlightbackground=BORDER_COLOR, highlightthickness=1).pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(priority_frame, text="سهم:", bg=CARD_BG, fg=TEXT_COLOR,
+             font=('Segoe UI', 10)).pack(side=tk.LEFT)
+        
+        # آدرس سرویس اسکن (اختیاری؛ در صورت خالی بودن، اسکن به صورت محلی انجام می‌شود)
+        service_frame = tk.Frame(settings_container, bg=CARD_BG)
+        service_frame.pack(fill=tk.X, pady=5)
+        
+        tk.Label(service_frame, text="سرویس اسکن:", bg=CARD_BG, fg=TEXT_COLOR,
+             font=('Segoe UI', 10)).pack(side=tk.RIGHT, padx=(0, 5))
+        
+        self.service_var = tk.StringVar(value=os.environ.get("IP_SCANNER_SERVICE", ""))
+        tk.Entry(service_frame, textvariable=self.service_var, width=16, justify='left',
+             bg=DARKER_BG, fg=TEXT_COLOR, insertbackground=TEXT_COLOR,
+             relief='flat', highlightbackground=BORDER_COLOR, highlightthickness=1).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # جستجوی DNS معکوس برای دستگاه‌هایی که با mDNS/LLMNR/NetBIOS نامی پیدا نکردند
+        dns_frame = tk.Frame(settings_container, bg=CARD_BG)
+        dns_frame.pack(fill=tk.X, pady=5)
+        
+        self.reverse_dns_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(dns_frame, text="جستجوی DNS معکوس برای دستگاه‌های بی‌نام", variable=self.reverse_dns_var,
+                   bg=CARD_BG, fg=TEXT_COLOR, selectcolor=DARKER_BG,
+                   activebackground=CARD_BG, activeforeground=TEXT_COLOR,
+                   font=('Segoe UI', 10)).pack(side=tk.RIGHT)
+        
         # پنل آمار در ستون راست
         stats_frame = ttk.LabelFrame(right_column, text="آمار اسکن", padding=15)
         stats_frame.pack(fill=tk.X, pady=(0, 15))
@@ -381,52 +511,29 @@ class IPScannerApp:
                                  state=tk.DISABLED)
         self.stop_button.pack(fill=tk.BOTH, expand=True)
         
-        # === بخش نتایج و لاگ (ستون چپ) ===
+        # دکمه بستن زبانه اسکن تمام‌شده
+        close_button_frame = tk.Frame(right_column, bg=PANEL_BG, padx=5, pady=5)
+        close_button_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        # نوار پیشرفت
-        progress_frame = ttk.Frame(left_column)
-        progress_frame.pack(fill=tk.X, pady=(0, 15))
+        self.close_button = tk.Button(close_button_frame, text="✕ بستن زبانه", 
+                                  command=self.close_job_view,
+                                  font=('Segoe UI', 10),
+                                  bg=PANEL_BG, fg=TEXT_COLOR,
+                                  activebackground=BORDER_COLOR, 
+                                  activeforeground=TEXT_COLOR,
+                                  relief='flat', bd=0,
+                                  state=tk.DISABLED)
+        self.close_button.pack(fill=tk.BOTH, expand=True)
         
-        self.progress_var = tk.DoubleVar(value=0.0)
-        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.pack(fill=tk.X)
+        # === بخش نتایج و لاگ (ستون چپ) ===
         
-        # جدول نتایج
+        # نتایج هر اسکن در یک زبانه جداگانه
         results_frame = ttk.LabelFrame(left_column, text="نتایج اسکن", padding=10)
         results_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
         
-        # ایجاد یک کارت گرافیکی برای جدول نتایج
-        results_card = tk.Frame(results_frame, bg=CARD_BG, highlightbackground=BORDER_COLOR, 
-                            highlightthickness=1, padx=5, pady=5)
-        results_card.pack(fill=tk.BOTH, expand=True, pady=5)
-        
-        # ساخت جدول
-        results_tree_frame = tk.Frame(results_card, bg=CARD_BG)
-        results_tree_frame.pack(fill=tk.BOTH, expand=True)
-        
-        columns = ("ip", "hostname", "status")
-        self.results_tree = ttk.Treeview(results_tree_frame, columns=columns, show="headings")
-        
-        # تعریف ستون‌ها
-        self.results_tree.heading("ip", text="آدرس IP")
-        self.results_tree.heading("hostname", text="نام میزبان")
-        self.results_tree.heading("status", text="وضعیت")
-        
-        self.results_tree.column("ip", width=150)
-        self.results_tree.column("hostname", width=250)
-        self.results_tree.column("status", width=100)
-        
-        # تنظیم رنگ و استایل برای تگ‌های مختلف
-        self.results_tree.tag_configure("active", background="#1E293B", foreground=SUCCESS_COLOR)
-        self.results_tree.tag_configure("inactive", background=DARKER_BG, foreground=SECONDARY_TEXT)
-        
-        # اسکرول بار برای جدول
-        tree_scroll = ttk.Scrollbar(results_tree_frame, orient="vertical", command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=tree_scroll.set)
-        
-        # قرار دادن جدول و اسکرول بار
-        self.results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.jobs_notebook = ttk.Notebook(results_frame)
+        self.jobs_notebook.pack(fill=tk.BOTH, expand=True)
+        self.jobs_notebook.bind("<<NotebookTabChanged>>", lambda event: self.refresh_stats())
         
         # محل نمایش لاگ
         log_frame = ttk.LabelFrame(left_column, text="گزارش فعالیت", padding=10)
@@ -489,27 +596,34 @@ class IPScannerApp:
         self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
         self.log_text.see(tk.END)
     
+    def selected_view(self):
+        """نمای اسکنِ زبانه انتخاب‌شده (یا None)"""
+        return self.job_views.get(self.jobs_notebook.select())
+    
     def start_scan(self):
-        """شروع عملیات اسکن"""
-        if self.is_scanning:
-            return
-        
-        # پاک‌سازی نتایج قبلی
-        self.results_tree.delete(*self.results_tree.get_children())
-        self.active_ips = []
-        
+        """شروع یک اسکن جدید در کنار اسکن‌های در حال اجرا"""
         # بررسی اعتبار مقادیر
         try:
             network = self.network_var.get()
             start_range = self.start_range.get()
             end_range = self.end_range.get()
             threads = self.threads_var.get()
+            rate = self.rate_var.get()
+            weight = self.weight_var.get()
+            priority = PRIORITY_LEVELS[self.priority_var.get()]
+            service_url = self.service_var.get().strip()
             
             if not (1 <= start_range <= 254 and 1 <= end_range <= 254 and start_range <= end_range):
                 raise ValueError("محدوده IP باید بین 1 تا 254 باشد")
                 
             if not (1 <= threads <= 50):
                 raise ValueError("تعداد تِرِد‌ها باید بین 1 تا 50 باشد")
+            
+            if not (0 <= rate <= 1000):
+                raise ValueError("نرخ پروب باید بین 0 تا 1000 باشد")
+            
+            if not (1 <= weight <= 10):
+                raise ValueError("سهم اسکن باید بین 1 تا 10 باشد")
                 
             # بررسی اعتبار آدرس شبکه
             try:
@@ -530,167 +644,273 @@ class IPScannerApp:
             except:
                 raise ValueError("آدرس شبکه نامعتبر است")
                 
-        except ValueError as e:
+        except (ValueError, tk.TclError) as e:
             messagebox.showerror("خطای ورودی", str(e))
             return
-            
-        # تغییر وضعیت دکمه‌ها
-        self.scan_button.config(state=tk.DISABLED)
-        self.stop_button.config(state=tk.NORMAL)
-        
-        # تنظیم وضعیت اسکن
-        self.is_scanning = True
-        self.progress_var.set(0)
-        self.status_var.set("در حال اسکن...")
-        self.active_count_var.set("0")
         
-        # شروع تایمر اسکن
-        self.scan_start_time = datetime.now()
-        self.update_scan_time()
-        
-        self.log(f"شروع اسکن شبکه {network}.{start_range} تا {network}.{end_range}")
-        self.log(f"تعداد تِرِد‌ها: {threads}")
-        
-        # شروع اسکن در یک ترد جداگانه
-        self.scan_thread = threading.Thread(
-            target=self.scan_network, 
-            args=(network, start_range, end_range, threads)
-        )
-        self.scan_thread.daemon = True
-        self.scan_thread.start()
+        # بودجه پروب‌های هم‌زمان و نرخ، برای همه اسکن‌ها مشترک است
+        self.scheduler.set_limits(max_in_flight=threads, rate=rate)
+        
+        # ایجاد زبانه جدید برای این اسکن
+        self.job_counter += 1
+        view = JobView(self.jobs_notebook, f"#{self.job_counter} {network}.{start_range}-{end_range}")
+        self.job_views[str(view.frame)] = view
+        view.reverse_dns = self.reverse_dns_var.get()
+        target = f"{network}.{start_range}-{network}.{end_range}"
+        
+        self.log(f"شروع اسکن {view.title} ({self.priority_var.get()}، سهم {weight})")
+        
+        if service_url:
+            self.log(f"اسکن از طریق سرویس: {service_url}")
+            # شروع اسکن در یک ترد جداگانه
+            scan_thread = threading.Thread(
+                target=self.scan_via_service, 
+                args=(view, service_url, target)
+            )
+            scan_thread.daemon = True
+            scan_thread.start()
+        else:
+            self.log(f"تعداد تِرِد‌ها: {threads}")
+            view.job = self.scheduler.submit(
+                [target], name=view.title, priority=priority, weight=weight,
+                on_result=lambda job, ip, hostname: self.handle_scan_result(view, ip, hostname),
+                on_progress=lambda job: self.root.after(
+                    0, lambda p=(job.completed / job.total) * 100: self.update_progress(view, p)),
+                on_finish=lambda job: self.root.after(0, lambda: self.finish_scan(view)))
+        
+        self.refresh_stats()
     
     def update_scan_time(self):
-        """به‌روزرسانی زمان اسکن"""
-        if self.is_scanning:
-            elapsed = datetime.now() - self.scan_start_time
-            # تبدیل به ساعت:دقیقه:ثانیه
-            hours, remainder = divmod(elapsed.total_seconds(), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            time_str = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
-            self.scan_time_var.set(time_str)
-            
-            # فراخوانی مجدد این تابع هر ثانیه
-            self.root.after(1000, self.update_scan_time)
-        else:
-            # پایان اسکن، نمایش زمان نهایی
-            elapsed = datetime.now() - self.scan_start_time
-            hours, remainder = divmod(elapsed.total_seconds(), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            time_str = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
-            self.scan_time_var.set(time_str)
+        """به‌روزرسانی زمان اسکن (هر ثانیه)"""
+        self.refresh_stats()
+        
+        # خواندن دوره‌ای جدول همسایه‌ها برای اسکن‌های در حال اجرا (هر ۵ ثانیه)
+        self.stats_ticks += 1
+        if self.stats_ticks % 5 == 0:
+            for view in list(self.job_views.values()):
+                if view.is_scanning and len(view.macs) < len(view.items):
+                    self.refresh_macs(view)
+        
+        # فراخوانی مجدد این تابع هر ثانیه
+        self.root.after(1000, self.update_scan_time)
     
-    def stop_scan(self):
-        """توقف عملیات اسکن"""
-        if not self.is_scanning:
+    def refresh_stats(self):
+        """نمایش آمار اسکنِ زبانه انتخاب‌شده و تنظیم وضعیت دکمه‌ها"""
+        view = self.selected_view()
+        if view is None:
+            self.status_var.set("آماده برای اسکن")
+            self.active_count_var.set("0")
+            self.scan_time_var.set("00:00:00")
+            self.stop_button.config(state=tk.DISABLED)
+            self.close_button.config(state=tk.DISABLED)
             return
-            
-        self.is_scanning = False
-        self.status_var.set("اسکن متوقف شد")
-        self.log("اسکن توسط کاربر متوقف شد")
+        
+        self.status_var.set(view.status)
+        self.active_count_var.set(str(len(view.active_ips)))
+        self.scan_time_var.set(view.elapsed())
         
         # تغییر وضعیت دکمه‌ها
-        self.scan_button.config(state=tk.NORMAL)
-        self.stop_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL if view.is_scanning else tk.DISABLED)
+        self.close_button.config(state=tk.DISABLED if view.is_scanning else tk.NORMAL)
     
-    def scan_ip(self, ip, result_list):
-        """اسکن یک آدرس IP"""
-        if not self.is_scanning:
+    def stop_scan(self):
+        """توقف اسکنِ زبانه انتخاب‌شده"""
+        view = self.selected_view()
+        if view is None or not view.is_scanning:
             return
             
-        is_active = ping_ip(ip)
-        status = "فعال" if is_active else "غیرفعال"
+        view.is_scanning = False
+        view.end_time = datetime.now()
+        view.status = "اسکن متوقف شد"
+        if view.job is not None:
+            self.scheduler.cancel(view.job)
+        self.log(f"اسکن {view.title} توسط کاربر متوقف شد")
+        self.refresh_stats()
+        self.refresh_macs(view)
+    
+    def close_job_view(self):
+        """بستن زبانه یک اسکن تمام‌شده"""
+        view = self.selected_view()
+        if view is None or view.is_scanning:
+            return
         
-        hostname = "ناشناس"
-        if is_active:
-            try:
-                hostname = socket.gethostbyaddr(ip)[0]
-            except socket.herror:
-                hostname = "ناشناس"
-                
-            result_list.append((ip, hostname))
+        del self.job_views[str(view.frame)]
+        self.jobs_notebook.forget(view.frame)
+        view.frame.destroy()
+        self.refresh_stats()
+    
+    def handle_scan_result(self, view, ip, hostname):
+        """ثبت یک IP فعال یافت‌شده (از ترد اسکن فراخوانی می‌شود)"""
+        if not view.is_scanning:
+            return
             
-            # نمایش در رابط کاربری (از طریق یک تابع امن برای ترد)
-            self.root.after(0, lambda: self.add_result_to_ui(ip, hostname, status))
-            # به‌روزرسانی شمارنده IP‌های فعال
-            self.root.after(0, lambda: self.active_count_var.set(str(len(result_list))))
+        view.active_ips.append((ip, hostname))
+        
+        # نمایش در رابط کاربری (از طریق یک تابع امن برای ترد)
+        # آدرس MAC بعداً به صورت دسته‌ای از جدول همسایه‌ها اضافه می‌شود
+        self.root.after(0, lambda: self.add_result_to_ui(view, ip, hostname, "فعال"))
     
-    def add_result_to_ui(self, ip, hostname, status):
-        """افزودن نتیجه به رابط کاربری"""
+    def add_result_to_ui(self, view, ip, hostname, status, mac="", vendor=""):
+        """افزودن نتیجه به جدول نتایج یک اسکن"""
+        # زبانه ممکن است در این فاصله بسته شده باشد
+        if str(view.frame) not in self.job_views:
+            return
+        
         # تعیین تگ برای ردیف جدید
         tag = "active" if status == "فعال" else "inactive"
         
         # افزودن به جدول
-        item_id = self.results_tree.insert("", tk.END, values=(ip, hostname, status), tags=(tag,))
+        view.items[ip] = view.results_tree.insert("", tk.END, values=(ip, hostname, mac, vendor, status), tags=(tag,))
+        
+        # به‌روزرسانی شمارنده IP‌های فعال
+        if view is self.selected_view():
+            self.active_count_var.set(str(len(view.active_ips)))
         
         # اگر فعال است، آن را لاگ کن
         if status == "فعال":
             self.log(f"IP فعال یافت شد: {ip} ({hostname})")
     
-    def update_progress(self, value):
-        """به‌روزرسانی نوار پیشرفت"""
-        self.progress_var.set(value)
+    def refresh_macs(self, view):
+        """خواندن جدول همسایه‌ها در ترد جداگانه و افزودن آدرس MAC به نتایج یک اسکن"""
+        if view.mac_refreshing:
+            return
+        view.mac_refreshing = True
+        
+        def read_table():
+            table = read_neighbour_table()
+            self.root.after(0, lambda: self.apply_macs(view, table))
+        
+        mac_thread = threading.Thread(target=read_table)
+        mac_thread.daemon = True
+        mac_thread.start()
+    
+    def apply_macs(self, view, table):
+        """نمایش آدرس MAC و سازنده برای ردیف‌هایی که در جدول همسایه‌ها هستند"""
+        view.mac_refreshing = False
+        # زبانه ممکن است در این فاصله بسته شده باشد
+        if str(view.frame) not in self.job_views:
+            return
+        
+        for ip, item_id in view.items.items():
+            mac = table.get(ip)
+            if not mac or view.macs.get(ip) == mac:
+                continue
+            view.macs[ip] = mac
+            view.results_tree.set(item_id, "mac", mac)
+            view.results_tree.set(item_id, "vendor", lookup_vendor(mac) or "ناشناس")
     
-    def scan_network(self, network, start, end, thread_count):
-        """اسکن شبکه با استفاده از چند ترد"""
+    def update_progress(self, view, value):
+        """به‌روزرسانی نوار پیشرفت یک اسکن"""
+        if view.is_scanning:
+            view.progress_var.set(value)
+    
+    def scan_via_service(self, view, service_url, target):
+        """ارسال اسکن به سرویس مشترک و دریافت جریان نتایج آن"""
         try:
-            total_ips = end - start + 1
-            completed = 0
-            
-            # تقسیم کار بین تردها
-            ip_chunks = (end - start + 1) // thread_count
-            thread_ranges = []
+            client = ScanServiceClient(service_url)
+            reply = client.submit([target])
+            if reply.get("cached"):
+                self.root.after(0, lambda: self.log("نتایج از حافظه نهان سرویس دریافت شد"))
+            elif reply.get("coalesced"):
+                self.root.after(0, lambda: self.log("اسکن مشابهی در سرویس در حال اجراست؛ به آن متصل شدیم"))
             
-            for i in range(thread_count):
-                chunk_start = start + i * ip_chunks
-                chunk_end = start + (i + 1) * ip_chunks - 1 if i < thread_count - 1 else end
-                thread_ranges.append((chunk_start, chunk_end))
-            
-            # استفاده از ThreadPoolExecutor برای اجرای همزمان اسکن
-            with ThreadPoolExecutor(max_workers=thread_count) as executor:
-                futures = []
-                
-                for t_start, t_end in thread_ranges:
-                    for i in range(t_start, t_end + 1):
-                        if not self.is_scanning:
-                            break
-                            
-                        ip = f"{network}.{i}"
-                        futures.append(
-                            executor.submit(self.scan_ip, ip, self.active_ips)
-                        )
-                        
-                        # به‌روزرسانی پیشرفت
-                        completed += 1
-                        progress = (completed / total_ips) * 100
-                        self.root.after(0, lambda p=progress: self.update_progress(p))
-                        
-                # منتظر اتمام همه تردها
-                for future in futures:
-                    future.result()
-            
-            # پایان اسکن
-            if self.is_scanning:  # اگر با دکمه توقف متوقف نشده باشد
-                self.root.after(0, self.finish_scan)
-                
+            events = client.events(reply["id"])
+            try:
+                for event in events:
+                    if not view.is_scanning:
+                        break
+                    if event["type"] == "host":
+                        self.handle_scan_result(view, event["ip"], event["hostname"])
+                    elif event["type"] == "progress":
+                        progress = (event["completed"] / event["total"]) * 100
+                        self.root.after(0, lambda p=progress: self.update_progress(view, p))
+                    elif event["type"] == "done":
+                        break
+            finally:
+                events.close()
         except Exception as e:
-            self.root.after(0, lambda: self.log(f"خطا در اسکن: {str(e)}"))
-            self.root.after(0, self.finish_scan)
+            message = f"خطا در اسکن: {str(e)}"
+            self.root.after(0, lambda: self.log(message))
+        
+        self.root.after(0, lambda: self.finish_scan(view))
+    
+    def finish_scan(self, view):
+        """اتمام یک اسکن"""
+        # اگر با دکمه توقف متوقف شده باشد، وضعیت قبلاً به‌روزرسانی شده است
+        if view.is_scanning:
+            self.complete_scan(view)
+        
+        # نام‌گذاری میزبان‌ها برای اسکن‌های کامل و متوقف‌شده
+        self.start_naming(view)
     
-    def finish_scan(self):
-        """اتمام عملیات اسکن"""
-        self.is_scanning = False
-        self.progress_var.set(100)
-        
-        if not self.active_ips:
-            self.status_var.set("اسکن تمام شد - هیچ IP فعالی یافت نشد")
-            self.log("اسکن به پایان رسید. هیچ IP فعالی در شبکه یافت نشد.")
+    def complete_scan(self, view):
+        """به‌روزرسانی وضعیت و آمار اسکنی که به پایان رسیده است"""
+        view.is_scanning = False
+        view.end_time = datetime.now()
+        view.progress_var.set(100)
+        
+        if not view.active_ips:
+            view.status = "اسکن تمام شد - هیچ IP فعالی یافت نشد"
+            self.log(f"اسکن {view.title} به پایان رسید. هیچ IP فعالی در شبکه یافت نشد.")
         else:
-            self.status_var.set(f"اسکن تمام شد - {len(self.active_ips)} IP فعال یافت شد")
-            self.log(f"اسکن به پایان رسید. تعداد {len(self.active_ips)} IP فعال در شبکه یافت شد.")
+            view.status = f"اسکن تمام شد - {len(view.active_ips)} IP فعال یافت شد"
+            self.log(f"اسکن {view.title} به پایان رسید. تعداد {len(view.active_ips)} IP فعال در شبکه یافت شد.")
         
-        # تغییر وضعیت دکمه‌ها
-        self.scan_button.config(state=tk.NORMAL)
-        self.stop_button.config(state=tk.DISABLED)
+        self.refresh_stats()
+        self.refresh_macs(view)
+    
+    def start_naming(self, view):
+        """شروع نام‌گذاری دسته‌ای میزبان‌های فعال یک اسکن (یک بار برای هر اسکن)"""
+        if view.naming_started:
+            return
+        view.naming_started = True
+        
+        unnamed = [ip for ip, hostname in view.active_ips if hostname == UNKNOWN_HOSTNAME]
+        if unnamed:
+            naming_thread = threading.Thread(target=self.discover_host_names, args=(view, unnamed))
+            naming_thread.daemon = True
+            naming_thread.start()
+    
+    def discover_host_names(self, view, ips):
+        """کشف نام میزبان‌ها با mDNS، LLMNR و NetBIOS و سپس DNS معکوس (در ترد جداگانه)"""
+        try:
+            names = discover_names(ips)
+        except OSError as e:
+            message = f"خطا در کشف نام میزبان‌ها: {str(e)}"
+            self.root.after(0, lambda: self.log(message))
+            names = {}
+        
+        if names:
+            self.root.after(0, lambda: self.apply_discovered_names(view, names, "mDNS/LLMNR/NetBIOS"))
+        
+        # جستجوی DNS معکوس فقط برای میزبان‌هایی که در مرحله قبل نامی پیدا نکردند
+        remaining = [ip for ip in ips if ip not in names]
+        if not view.reverse_dns or not remaining:
+            return
+        with ThreadPoolExecutor(max_workers=min(20, len(remaining))) as executor:
+            resolved = dict(zip(remaining, executor.map(resolve_hostname, remaining)))
+        dns_names = {ip: name for ip, name in resolved.items() if name != UNKNOWN_HOSTNAME}
+        if dns_names:
+            self.root.after(0, lambda: self.apply_discovered_names(view, dns_names, "DNS معکوس"))
+    
+    def apply_discovered_names(self, view, names, source):
+        """به‌روزرسانی نام میزبان‌ها در جدول نتایج یک اسکن"""
+        # زبانه ممکن است در این فاصله بسته شده باشد
+        if str(view.frame) not in self.job_views:
+            return
+        
+        view.active_ips = [(ip, names.get(ip, hostname)) for ip, hostname in view.active_ips]
+        for ip, name in names.items():
+            item_id = view.items.get(ip)
+            if item_id is not None:
+                view.results_tree.set(item_id, "hostname", name)
+        
+        self.log(f"نام {len(names)} دستگاه در اسکن {view.title} با {source} پیدا شد")
+    
+    def on_close(self):
+        """لغو اسکن‌های در حال اجرا و بستن برنامه"""
+        self.scheduler.shutdown()
+        self.root.destroy()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""کشف دسته‌ای نام دستگاه‌های محلی با mDNS، LLMNR و NetBIOS
+
+به جای جستجوی معکوس DNS جداگانه برای هر میزبان (که برای هر شکست یک مهلت کامل
+resolver هزینه دارد)، چند پرس‌وجوی کوچک از یک سوکت UDP ارسال می‌شود و همه
+پاسخ‌ها در یک بازه زمانی واحد جمع‌آوری می‌شوند:
+
+- mDNS: پرس‌وجوهای PTR معکوس (چند سؤال در هر بسته) و فهرست سرویس‌ها (DNS-SD)
+  به گروه چندپخشی 224.0.0.251، که رکوردهای A در پاسخ‌ها نام میزبان‌ها را می‌دهند
+- LLMNR: پرس‌وجوی PTR معکوس به هر میزبان (پورت 5355)
+- NBNS: پرس‌وجوی وضعیت گره (NBSTAT) به هر میزبان (پورت 137)
+
+نمونه اجرا:
+    python name_discovery.py 192.168.1.0/24 --timeout 1.5
+"""
+
+import sys
+import time
+import random
+import socket
+import struct
+import argparse
+import itertools
+
+from scanner_core import ip_range, merge_targets
+
+MDNS_ADDRESS = ("224.0.0.251", 5353)
+LLMNR_PORT = 5355
+NBNS_PORT = 137
+
+TYPE_A = 1
+TYPE_PTR = 12
+TYPE_NBSTAT = 33
+CLASS_IN = 1
+# بیت درخواست پاسخ unicast در mDNS
+CLASS_UNICAST_RESPONSE = 0x8000
+
+# تعداد سؤال‌های PTR در هر بسته mDNS تا اندازه بسته کمتر از MTU بماند
+MDNS_QUESTIONS_PER_PACKET = 32
+
+# سرویس‌های رایج که در کنار فهرست کلی سرویس‌ها پرس‌وجو می‌شوند
+MDNS_SERVICES = (
+    "_services._dns-sd._udp.local",
+    "_device-info._tcp.local",
+    "_workstation._tcp.local",
+    "_http._tcp.local",
+    "_smb._tcp.local",
+    "_ipp._tcp.local",
+    "_printer._tcp.local",
+    "_airplay._tcp.local",
+    "_googlecast._tcp.local",
+    "_hap._tcp.local",
+    "_spotify-connect._tcp.local",
+)
+
+# اولویت منابع نام؛ نام با اولویت بالاتر جایگزین نام‌های دیگر می‌شود
+SOURCE_RANK = {"nbns": 1, "llmnr": 2, "mdns": 3}
+
+def reverse_name(ip):
+    """نام دامنه معکوس یک آدرس IPv4 (مانند 1.1.168.192.in-addr.arpa)"""
+    return '.'.join(reversed(ip.split('.'))) + ".in-addr.arpa"
+
+def encode_name(name):
+    """کدگذاری نام دامنه به قالب DNS"""
+    encoded = b""
+    for label in name.rstrip('.').split('.'):
+        data = label.encode('utf-8')
+        encoded += bytes([len(data)]) + data
+    return encoded + b"\x00"
+
+def build_query(transaction_id, questions, qclass=CLASS_IN):
+    """ساخت بسته پرس‌وجوی DNS با یک یا چند سؤال (name, qtype)"""
+    packet = struct.pack(">HHHHHH", transaction_id, 0, len(questions), 0, 0, 0)
+    for name, qtype in questions:
+        packet += encode_name(name) + struct.pack(">HH", qtype, qclass)
+    return packet
+
+def build_nbstat_query(transaction_id):
+    """ساخت پرس‌وجوی وضعیت گره NetBIOS برای نام '*'"""
+    # کدگذاری سطح اول NetBIOS: هر نیم‌بایت به یک حرف از 'A' تبدیل می‌شود
+    raw = b"*" + b"\x00" * 15
+    encoded = bytes(itertools.chain.from_iterable((65 + (b >> 4), 65 + (b & 0x0F)) for b in raw))
+    return (struct.pack(">HHHHHH", transaction_id, 0, 1, 0, 0, 0)
+            + bytes([32]) + encoded + b"\x00" + struct.pack(">HH", TYPE_NBSTAT, CLASS_IN))
+
+def read_name(data, offset):
+    """خواندن یک نام (با پشتیبانی از فشرده‌سازی) و بازگرداندن (name, offset بعدی)"""
+    labels = []
+    end_offset = None
+    for _ in range(128):  # جلوگیری از حلقه بی‌پایان در بسته‌های خراب
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end_offset is None:
+                end_offset = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('utf-8', errors='replace'))
+        offset += length
+    else:
+        raise ValueError("نام نامعتبر در بسته DNS")
+    return '.'.join(labels), (end_offset if end_offset is not None else offset)
+
+def parse_records(data):
+    """خواندن همه رکوردهای پاسخ یک بسته DNS به صورت (name, type, rdata_offset, rdata_length)"""
+    _, _, qdcount, ancount, nscount, arcount = struct.unpack_from(">HHHHHH", data, 0)
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = read_name(data, offset)
+        offset += 4
+    records = []
+    for _ in range(ancount + nscount + arcount):
+        name, offset = read_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack_from(">HHIH", data, offset)
+        offset += 10
+        records.append((name, rtype, offset, rdlength))
+        offset += rdlength
+    return records
+
+def parse_nbstat(data):
+    """نام ایستگاه کاری از پاسخ وضعیت گره NetBIOS؛ در صورت نبود None"""
+    for _, rtype, offset, rdlength in parse_records(data):
+        if rtype != TYPE_NBSTAT or rdlength < 1:
+            continue
+        count = data[offset]
+        offset += 1
+        for i in range(count):
+            entry = data[offset + i * 18:offset + (i + 1) * 18]
+            if len(entry) < 18:
+                break
+            name = entry[:15].decode('ascii', errors='replace').rstrip(' \x00')
+            suffix = entry[15]
+            flags = struct.unpack(">H", entry[16:18])[0]
+            # نام یکتا (نه گروهی) با پسوند 0x00 نام ایستگاه کاری است
+            if suffix == 0x00 and not flags & 0x8000 and name:
+                return name
+    return None
+
+class _Collector:
+    """جمع‌آوری نام‌ها از منابع مختلف با در نظر گرفتن اولویت هر منبع"""
+
+    def __init__(self, ips):
+        self.targets = set(ips)
+        self.names = {}
+
+    def add(self, ip, name, source):
+        name = name.rstrip('.')
+        if ip not in self.targets or not name:
+            return
+        current = self.names.get(ip)
+        if current is None or SOURCE_RANK[source] > current[1]:
+            self.names[ip] = (name, SOURCE_RANK[source])
+
+    def complete(self):
+        # وقتی همه میزبان‌ها از بهترین منبع نام گرفته‌اند، نیازی به انتظار بیشتر نیست
+        return (len(self.names) == len(self.targets)
+                and all(rank == SOURCE_RANK["mdns"] for _, rank in self.names.values()))
+
+def _ptr_target(name):
+    """تبدیل نام in-addr.arpa به آدرس IP؛ برای نام‌های دیگر None"""
+    suffix = ".in-addr.arpa"
+    if not name.lower().endswith(suffix):
+        return None
+    parts = name[:-len(suffix)].split('.')
+    if len(parts) != 4:
+        return None
+    return '.'.join(reversed(parts))
+
+def _handle_dns_response(data, collector, source, services, service_queue):
+    for name, rtype, offset, rdlength in parse_records(data):
+        if rtype == TYPE_A and rdlength == 4:
+            collector.add(socket.inet_ntoa(data[offset:offset + 4]), name, source)
+        elif rtype == TYPE_PTR:
+            target, _ = read_name(data, offset)
+            ip = _ptr_target(name)
+            if ip is not None:
+                collector.add(ip, target, source)
+            elif name.lower() == "_services._dns-sd._udp.local" and target not in services:
+                # نوع سرویس جدید؛ در همین بازه پرس‌وجو می‌شود
+                services.add(target)
+                service_queue.append(target)
+
+def discover_names(ips, timeout=1.0, mdns=True, llmnr=True, nbns=True):
+    """کشف نام میزبان‌ها با mDNS، LLMNR و NetBIOS در یک بازه شنود واحد
+
+    خروجی دیکشنری {ip: name} برای میزبان‌هایی است که پاسخ داده‌اند.
+    """
+    ips = list(dict.fromkeys(ips))
+    collector = _Collector(ips)
+    if not ips:
+        return {}
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.bind(("", 0))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 255)
+
+        def send(packet, address):
+            try:
+                sock.sendto(packet, address)
+            except OSError:
+                pass  # مثلاً مسیر چندپخشی وجود ندارد
+
+        # پرس‌وجوها از پورت غیر 5353 هستند، بنابراین پاسخ‌دهنده‌های mDNS به صورت unicast پاسخ می‌دهند
+        transaction_id = random.randrange(0x10000)
+        services = set(MDNS_SERVICES)
+        service_queue = []
+        if mdns:
+            questions = [(reverse_name(ip), TYPE_PTR) for ip in ips]
+            for i in range(0, len(questions), MDNS_QUESTIONS_PER_PACKET):
+                send(build_query(transaction_id, questions[i:i + MDNS_QUESTIONS_PER_PACKET],
+                                 CLASS_IN | CLASS_UNICAST_RESPONSE), MDNS_ADDRESS)
+            send(build_query(transaction_id, [(service, TYPE_PTR) for service in MDNS_SERVICES],
+                             CLASS_IN | CLASS_UNICAST_RESPONSE), MDNS_ADDRESS)
+        for ip in ips:
+            if llmnr:
+                send(build_query(transaction_id, [(reverse_name(ip), TYPE_PTR)]), (ip, LLMNR_PORT))
+            if nbns:
+                send(build_nbstat_query(transaction_id), (ip, NBNS_PORT))
+
+        deadline = time.monotonic() + timeout
+        while not collector.complete():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                data, (address, port) = sock.recvfrom(9000)
+            except socket.timeout:
+                break
+            except OSError:
+                continue  # مثلاً ICMP port unreachable در ویندوز
+
+            try:
+                if port == NBNS_PORT:
+                    name = parse_nbstat(data)
+                    if name:
+                        collector.add(address, name, "nbns")
+                elif port in (MDNS_ADDRESS[1], LLMNR_PORT):
+                    source = "mdns" if port == MDNS_ADDRESS[1] else "llmnr"
+                    _handle_dns_response(data, collector, source, services, service_queue)
+            except (ValueError, IndexError, struct.error, OSError):
+                continue  # بسته خراب یا ناقص
+
+            # پرس‌وجوی نمونه‌های انواع سرویس تازه کشف‌شده
+            while service_queue:
+                batch = service_queue[:MDNS_QUESTIONS_PER_PACKET]
+                del service_queue[:MDNS_QUESTIONS_PER_PACKET]
+                send(build_query(transaction_id, [(service, TYPE_PTR) for service in batch],
+                                 CLASS_IN | CLASS_UNICAST_RESPONSE), MDNS_ADDRESS)
+    finally:
+        sock.close()
+
+    return {ip: name for ip, (name, _) in collector.names.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="کشف نام دستگاه‌های شبکه محلی")
+    parser.add_argument("target", nargs="+", help="CIDR، بازه a-b یا یک IP")
+    parser.add_argument("--timeout", type=float, default=1.0, help="مدت شنود پاسخ‌ها (ثانیه)")
+    args = parser.parse_args(argv)
+
+    ips = [ip for first, last in merge_targets(args.target) for ip in ip_range(first, last)]
+    started = time.perf_counter()
+    names = discover_names(ips, timeout=args.timeout)
+    for ip in sorted(names, key=lambda value: socket.inet_aton(value)):
+        print(f"{ip}\t{names[ip]}")
+    print(f"{len(names)} نام از {len(ips)} آدرس در {time.perf_counter() - started:.2f} ثانیه")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""جستجوی سریع سازنده دستگاه (vendor) از روی پیشوند OUI آدرس MAC
+
+فایل‌های ثبت IEEE (oui.csv، mam.csv، oui36.csv یا oui.txt) یک بار به یک
+فهرست (index) باینری فشرده تبدیل می‌شوند. این فهرست هنگام اجرا با mmap باز
+و با جستجوی دودویی خوانده می‌شود، بنابراین بارگذاری آن چند میلی‌ثانیه طول
+می‌کشد و نیازی به پردازش فایل متنی چند مگابایتی نیست.
+
+ساختار فایل فهرست:
+    سرآیند: MAGIC (4 بایت)، نسخه (2 بایت)، تعداد رکوردها (4 بایت)
+    رکوردها: کلید 8 بایتی و آفست نام 4 بایتی، مرتب بر اساس کلید
+    جدول نام‌ها: طول 2 بایتی و متن UTF-8 هر نام
+
+کلید هر رکورد (پیشوند 48 بیتی << 8) | طول پیشوند است تا بلوک‌های MA-L (24 بیت)،
+MA-M (28 بیت) و MA-S (36 بیت) در یک جدول کنار هم قرار بگیرند.
+
+نمونه اجرا:
+    python oui_lookup.py build oui.csv mam.csv oui36.csv -o oui.idx
+    python oui_lookup.py lookup 00:1A:2B:3C:4D:5E
+"""
+
+import os
+import re
+import sys
+import csv
+import mmap
+import struct
+import argparse
+import threading
+
+MAGIC = b"OUIX"
+VERSION = 1
+HEADER = struct.Struct(">4sHI")
+RECORD = struct.Struct(">QI")
+NAME_LENGTH = struct.Struct(">H")
+
+# طول پیشوندها از بلندترین به کوتاه‌ترین برای یافتن دقیق‌ترین تطابق
+PREFIX_BITS = (36, 28, 24)
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "IP_SCANNER_OUI_INDEX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "oui.idx"))
+
+_TXT_LINE = re.compile(r"^\s*([0-9A-Fa-f]{2}(?:-[0-9A-Fa-f]{2}){2})\s+\(hex\)\s+(.+?)\s*$")
+
+def mac_to_int(mac):
+    """تبدیل آدرس MAC (با جداکننده : یا - یا بدون جداکننده) به عدد 48 بیتی"""
+    digits = re.sub(r"[^0-9A-Fa-f]", "", mac)
+    if len(digits) != 12:
+        raise ValueError(f"آدرس MAC نامعتبر: {mac}")
+    return int(digits, 16)
+
+def _record_key(prefix_value, bits):
+    mask = ((1 << bits) - 1) << (48 - bits)
+    return ((prefix_value & mask) << 8) | bits
+
+def parse_registry(path):
+    """خواندن یک فایل ثبت IEEE و تولید (پیشوند 48 بیتی، طول پیشوند، نام سازنده)"""
+    with open(path, encoding='utf-8', errors='replace', newline='') as f:
+        first_line = f.readline()
+        f.seek(0)
+        if first_line.startswith("Registry,"):
+            # قالب CSV: Registry,Assignment,Organization Name,Organization Address
+            for row in csv.DictReader(f):
+                assignment = (row.get("Assignment") or "").strip()
+                name = (row.get("Organization Name") or "").strip()
+                if not assignment or not name:
+                    continue
+                bits = len(assignment) * 4
+                if bits not in PREFIX_BITS:
+                    continue
+                yield int(assignment, 16) << (48 - bits), bits, name
+        else:
+            # قالب متنی oui.txt: "00-00-0C   (hex)		Cisco Systems, Inc"
+            for line in f:
+                match = _TXT_LINE.match(line)
+                if match:
+                    yield int(match.group(1).replace('-', ''), 16) << 24, 24, match.group(2)
+
+def build_index(registry_paths, output_path):
+    """ساخت فایل فهرست از یک یا چند فایل ثبت IEEE؛ تعداد رکوردها را برمی‌گرداند"""
+    entries = {}
+    for path in registry_paths:
+        for prefix_value, bits, name in parse_registry(path):
+            entries[_record_key(prefix_value, bits)] = name
+
+    names = bytearray()
+    name_offsets = {}
+    records = []
+    for key in sorted(entries):
+        name = entries[key]
+        if name not in name_offsets:
+            encoded = name.encode('utf-8')[:0xFFFF]
+            name_offsets[name] = len(names)
+            names += NAME_LENGTH.pack(len(encoded)) + encoded
+        records.append(RECORD.pack(key, name_offsets[name]))
+
+    # نوشتن در فایل موقت و جایگزینی، تا خواننده‌ها هیچ‌وقت فایل ناقص نبینند
+    temp_path = output_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        f.write(b"".join(records))
+        f.write(names)
+    os.replace(temp_path, output_path)
+    return len(records)
+
+class OUIIndex:
+    """فهرست OUI نگاشته‌شده در حافظه (mmap) با جستجوی دودویی"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"فایل فهرست OUI نامعتبر است: {path}")
+            self._names_start = HEADER.size + self.count * RECORD.size
+            if len(self._map) < self._names_start:
+                raise ValueError(f"فایل فهرست OUI ناقص است: {path}")
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+
+    def close(self):
+        self._map.close()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def lookup(self, mac):
+        """نام سازنده برای یک آدرس MAC؛ در صورت عدم وجود None"""
+        try:
+            value = mac_to_int(mac)
+        except ValueError:
+            return None
+        for bits in PREFIX_BITS:
+            offset = self._find(_record_key(value, bits))
+            if offset is not None:
+                return self._name_at(offset)
+        return None
+
+    def _find(self, key):
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            record_key, name_offset = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle - 1
+            else:
+                return name_offset
+        return None
+
+    def _name_at(self, offset):
+        start = self._names_start + offset
+        (length,) = NAME_LENGTH.unpack_from(self._map, start)
+        start += NAME_LENGTH.size
+        return self._map[start:start + length].decode('utf-8', errors='replace')
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_default_index():
+    """بارگذاری یک‌باره فهرست پیش‌فرض؛ اگر فایل فهرست وجود نداشته باشد None"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            try:
+                _default_index = OUIIndex(DEFAULT_INDEX_PATH)
+            except (OSError, ValueError):
+                _default_index = False
+        return _default_index or None
+
+def lookup_vendor(mac):
+    """نام سازنده با استفاده از فهرست پیش‌فرض؛ در صورت نبود فهرست یا تطابق None"""
+    index = get_default_index()
+    if index is None or not mac:
+        return None
+    return index.lookup(mac)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="فهرست سازندگان کارت شبکه (OUI)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="ساخت فهرست از فایل‌های ثبت IEEE")
+    build_parser.add_argument("registry", nargs="+", help="oui.csv، mam.csv، oui36.csv یا oui.txt")
+    build_parser.add_argument("-o", "--output", default=DEFAULT_INDEX_PATH)
+
+    lookup_parser = commands.add_parser("lookup", help="جستجوی سازنده یک آدرس MAC")
+    lookup_parser.add_argument("mac", nargs="+")
+    lookup_parser.add_argument("-i", "--index", default=DEFAULT_INDEX_PATH)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.registry, args.output)
+        print(f"فهرست OUI با {count} رکورد در {args.output} ساخته شد")
+        return 0
+
+    try:
+        index = OUIIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"خطا در بارگذاری فهرست OUI: {e}")
+        return 1
+    with index:
+        for mac in args.mac:
+            print(f"{mac}\t{index.lookup(mac) or 'ناشناس'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""زمان‌بند اسکن‌های هم‌زمان با اولویت و سهم، روی یک بودجه مشترک پروب
+
+همه اسکن‌ها از یک مجموعه ترد مشترک (سقف پروب‌های هم‌زمان) و یک محدودیت نرخ
+(پروب در ثانیه) استفاده می‌کنند. هر بار که یک ترد آزاد می‌شود، آدرس بعدی از
+اسکنی با بالاترین اولویت برداشته می‌شود، بنابراین یک بررسی کوچک و فوری پشت
+یک اسکن بزرگ پس‌زمینه منتظر نمی‌ماند. بین اسکن‌های هم‌اولویت، پروب‌ها به نسبت
+سهم (weight) هر اسکن تقسیم می‌شوند.
+"""
+
+import time
+import threading
+import itertools
+import ipaddress
+
+from scanner_core import merge_targets, ping_ip, resolve_hostname, scan_host
+
+PRIORITY_BACKGROUND = 0
+PRIORITY_NORMAL = 5
+PRIORITY_INTERACTIVE = 10
+
+class RateLimiter:
+    """محدودکننده نرخ به روش سطل توکن؛ نرخ صفر یعنی بدون محدودیت"""
+
+    def __init__(self, rate=0):
+        self.lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = rate
+            self.tokens = min(1.0, rate)
+            self.updated = time.monotonic()
+
+    def acquire(self):
+        """انتظار تا مجاز شدن یک پروب"""
+        while True:
+            with self.lock:
+                if self.rate <= 0:
+                    return
+                now = time.monotonic()
+                # ظرفیت سطل برابر با یک ثانیه پروب است
+                self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+class ScheduledScan:
+    """یک اسکن ثبت‌شده در زمان‌بند"""
+
+    def __init__(self, job_id, ranges, name, priority, weight, on_result, on_progress, on_finish):
+        self.id = job_id
+        self.name = name or f"اسکن {job_id}"
+        self.priority = priority
+        self.weight = max(1, weight)
+        self.total = sum(last - first + 1 for first, last in ranges)
+        self.completed = 0
+        self.inflight = 0
+        self.results = []
+        self.status = "running"
+        self.cancelled = False
+
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+
+        self._ranges = [list(item) for item in ranges]
+        # زمان مجازی برای تقسیم منصفانه وزن‌دار بین اسکن‌های هم‌اولویت
+        self._virtual_time = 0.0
+
+    @property
+    def finished(self):
+        return self.status != "running"
+
+    @property
+    def has_pending(self):
+        return bool(self._ranges) and not self.cancelled
+
+    def cancel(self):
+        """توقف ارسال پروب‌های جدید؛ پروب‌های در حال اجرا تمام می‌شوند"""
+        self.cancelled = True
+
+    def _next_ip(self):
+        current = self._ranges[0]
+        ip = str(ipaddress.IPv4Address(current[0]))
+        current[0] += 1
+        if current[0] > current[1]:
+            self._ranges.pop(0)
+        self._virtual_time += 1.0 / self.weight
+        return ip
+
+class ScanScheduler:
+    """اجرای چند اسکن هم‌زمان با بودجه مشترک پروب‌های هم‌زمان و نرخ"""
+
+    def __init__(self, max_in_flight=20, rate=0, probe=ping_ip, resolve=resolve_hostname, log=print):
+        self.probe = probe
+        self.resolve = resolve
+        self.log = log
+        self.max_in_flight = 0
+        self.inflight = 0
+        self.jobs = []
+        self.workers = []
+        self.rate_limiter = RateLimiter(rate)
+
+        self.condition = threading.Condition()
+        self._stopped = False
+        self._ids = itertools.count(1)
+        self.set_limits(max_in_flight=max_in_flight)
+
+    def set_limits(self, max_in_flight=None, rate=None):
+        """تغییر سقف پروب‌های هم‌زمان و نرخ پروب برای همه اسکن‌ها"""
+        if rate is not None:
+            self.rate_limiter.set_rate(rate)
+        if max_in_flight is None:
+            return
+        with self.condition:
+            self.max_in_flight = max(1, max_in_flight)
+            # تردهای متوقف‌شده شمرده نمی‌شوند تا جایگزین شوند
+            self.workers = [worker for worker in self.workers if worker.is_alive()]
+            while len(self.workers) < self.max_in_flight:
+                worker = threading.Thread(target=self._worker, daemon=True)
+                self.workers.append(worker)
+                worker.start()
+            self.condition.notify_all()
+
+    def submit(self, targets, name=None, priority=PRIORITY_NORMAL, weight=1,
+               on_result=None, on_progress=None, on_finish=None):
+        """ثبت یک اسکن جدید
+
+        on_result(job, ip, hostname)، on_progress(job) و on_finish(job) از تردهای
+        زمان‌بند فراخوانی می‌شوند.
+        """
+        ranges = merge_targets(targets)
+        if not ranges:
+            raise ValueError("هیچ هدفی برای اسکن مشخص نشده است")
+
+        with self.condition:
+            job = ScheduledScan(next(self._ids), ranges, name, priority, weight,
+                                on_result, on_progress, on_finish)
+            # اسکن جدید از زمان مجازی اسکن‌های هم‌اولویت شروع می‌کند تا سهم اضافه نگیرد
+            peers = [other._virtual_time for other in self.jobs
+                     if other.priority == priority and other.has_pending]
+            job._virtual_time = min(peers) if peers else 0.0
+            self.jobs.append(job)
+            self.condition.notify_all()
+        return job
+
+    def cancel(self, job):
+        """لغو یک اسکن"""
+        with self.condition:
+            job.cancel()
+            finished = self._check_finished(job)
+        if finished:
+            self._notify(job, job.on_finish, job)
+
+    def shutdown(self):
+        """لغو همه اسکن‌ها و توقف تردهای زمان‌بند"""
+        with self.condition:
+            for job in self.jobs:
+                job.cancel()
+            self._stopped = True
+            self.condition.notify_all()
+
+    def _has_work(self):
+        return self.inflight < self.max_in_flight and any(job.has_pending for job in self.jobs)
+
+    def _pick(self):
+        runnable = [job for job in self.jobs if job.has_pending]
+        if not runnable or self.inflight >= self.max_in_flight:
+            return None
+        top = max(job.priority for job in runnable)
+        return min((job for job in runnable if job.priority == top),
+                   key=lambda job: job._virtual_time)
+
+    def _check_finished(self, job):
+        # باید با قفل گرفته‌شده فراخوانی شود
+        if job.finished or job.inflight or job.has_pending:
+            return False
+        job.status = "cancelled" if job.cancelled else "done"
+        self.jobs.remove(job)
+        return True
+
+    def _notify(self, job, callback, *args):
+        """فراخوانی یک تابع بازخورد؛ خطای آن ثبت می‌شود و ترد زمان‌بند را متوقف نمی‌کند"""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            self.log(f"خطا در پردازش نتیجه {job.name}: {e}")
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self._stopped and not self._has_work():
+                    self.condition.wait()
+                if self._stopped:
+                    return
+
+            # انتخاب اسکن پس از گرفتن مجوز نرخ، تا اسکن فوری‌ای که در این فاصله
+            # ثبت شده از اسکن پس‌زمینه جلو بیفتد
+            self.rate_limiter.acquire()
+
+            with self.condition:
+                job = self._pick()
+                if job is None:
+                    continue
+                ip = job._next_ip()
+                job.inflight += 1
+                self.inflight += 1
+
+            try:
+                result = scan_host(ip, self.probe, self.resolve)
+            except Exception:
+                result = None
+
+            with self.condition:
+                job.completed += 1
+                if result is not None:
+                    job.results.append(result)
+
+            # کاهش تعداد در حال اجرا پس از فراخوانی‌ها، تا on_finish همیشه آخرین فراخوانی باشد
+            if result is not None:
+                self._notify(job, job.on_result, job, *result)
+            self._notify(job, job.on_progress, job)
+
+            with self.condition:
+                job.inflight -= 1
+                self.inflight -= 1
+                finished = self._check_finished(job)
+                self.condition.notify_all()
+
+            if finished:
+                self._notify(job, job.on_finish, job)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""سرویس محلی اسکن با API جریانی (streaming) روی HTTP
+
+به جای اینکه هر کاربر نمونه جداگانه‌ای از اسکنر اجرا کند، یک سرویس واحد اسکن‌ها
+را اجرا می‌کند و چند کلاینت (از جمله رابط گرافیکی) به آن متصل می‌شوند.
+درخواست‌های یکسان هم‌زمان با هم ادغام می‌شوند و نتایج تازه از حافظه نهان
+(cache) برگردانده می‌شوند.
+
+API:
+    POST /scans               بدنه: {"targets": ["192.168.1.0/24", ...]}
+                              پاسخ: {"id": ..., "coalesced": ..., "cached": ...}
+    GET  /scans/<id>          وضعیت و نتایج فعلی اسکن
+    GET  /scans/<id>/events   جریان رویدادها؛ هر خط یک شیء JSON (NDJSON)
+
+رویدادهای جریان:
+    {"type": "host", "ip": ..., "hostname": ...}
+    {"type": "progress", "completed": ..., "total": ...}
+    {"type": "done", "status": ..., "hosts": ...}
+
+نمونه اجرا:
+    python scan_service.py --port 9760
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import itertools
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scanner_core import ip_range, merge_targets, ping_ip, resolve_hostname, scan_ips
+
+DEFAULT_PORT = 9760
+# بیشترین تعداد آدرس مجاز در یک درخواست اسکن (معادل یک /16)
+DEFAULT_MAX_ADDRESSES = 65536
+
+class ScanJob:
+    """یک اسکن در حال اجرا یا تمام‌شده که چند کلاینت می‌توانند رویدادهایش را دنبال کنند"""
+
+    def __init__(self, job_id, key):
+        self.id = job_id
+        self.key = key
+        self.total = sum(last - first + 1 for first, last in key)
+        self.completed = 0
+        self.results = []
+        self.status = "running"
+        self.created = time.time()
+        self.finished_at = None
+
+        self.events = []
+        self.condition = threading.Condition()
+        self._last_percent = -1
+        self._last_progress = 0.0
+
+    @property
+    def finished(self):
+        return self.status != "running"
+
+    def add_host(self, ip, hostname):
+        with self.condition:
+            self.results.append((ip, hostname))
+            self._emit({"type": "host", "ip": ip, "hostname": hostname})
+
+    def set_progress(self, completed, total):
+        with self.condition:
+            self.completed = completed
+            # برای اسکن‌های بزرگ، فقط با هر یک درصد پیشرفت یا هر یک ثانیه رویداد ثبت می‌شود
+            percent = (completed * 100) // total if total else 100
+            now = time.monotonic()
+            if percent != self._last_percent or now - self._last_progress >= 1.0:
+                self._last_percent = percent
+                self._last_progress = now
+                self._emit({"type": "progress", "completed": completed, "total": total})
+
+    def finish(self, status):
+        with self.condition:
+            self.status = status
+            self.finished_at = time.time()
+            self._emit({"type": "done", "status": status, "hosts": len(self.results)})
+
+    def iter_events(self, start=0):
+        """تولید رویدادها از ابتدا تا پایان اسکن؛ در صورت نیاز منتظر رویداد جدید می‌ماند"""
+        index = start
+        while True:
+            with self.condition:
+                while index >= len(self.events) and not self.finished:
+                    self.condition.wait()
+                batch = self.events[index:]
+                finished = self.finished
+            index += len(batch)
+            yield from batch
+            if finished and index >= len(self.events):
+                return
+
+    def summary(self):
+        with self.condition:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "total": self.total,
+                "completed": self.completed,
+                "results": [list(result) for result in self.results],
+            }
+
+    def _emit(self, event):
+        # باید با قفل condition فراخوانی شود
+        self.events.append(event)
+        self.condition.notify_all()
+
+class ScanService:
+    """موتور مشترک اسکن با ادغام درخواست‌های یکسان و حافظه نهان نتایج"""
+
+    def __init__(self, threads=20, cache_ttl=60.0, retention=600.0, probe=ping_ip,
+                 resolve=resolve_hostname, max_addresses=DEFAULT_MAX_ADDRESSES, log=print):
+        self.threads = threads
+        self.max_addresses = max_addresses
+        self.cache_ttl = cache_ttl
+        self.retention = retention
+        self.probe = probe
+        self.resolve = resolve
+        self.log = log
+
+        self.jobs = {}
+        self.jobs_by_key = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self._ids = itertools.count(1)
+
+    def submit(self, targets):
+        """ثبت یک اسکن؛ خروجی (job, coalesced, cached) است"""
+        key = tuple(merge_targets(targets))
+        if not key:
+            raise ValueError("هیچ هدفی برای اسکن مشخص نشده است")
+        total = sum(last - first + 1 for first, last in key)
+        if total > self.max_addresses:
+            raise ValueError(f"تعداد آدرس‌ها ({total}) بیش از حد مجاز ({self.max_addresses}) است")
+
+        with self.lock:
+            self._prune()
+            job = self.jobs_by_key.get(key)
+            if job is not None:
+                if not job.finished:
+                    return job, True, False
+                if job.status == "done" and time.time() - job.finished_at < self.cache_ttl:
+                    return job, False, True
+
+            job = ScanJob(str(next(self._ids)), key)
+            self.jobs[job.id] = job
+            self.jobs_by_key[key] = job
+
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job, False, False
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def shutdown(self):
+        """توقف اسکن‌های در حال اجرا"""
+        self.stop_event.set()
+
+    def _run(self, job):
+        self.log(f"شروع اسکن {job.id}: {job.total} آدرس")
+        ips = itertools.chain.from_iterable(ip_range(first, last) for first, last in job.key)
+        try:
+            scan_ips(ips, self.threads,
+                     on_result=job.add_host,
+                     on_progress=job.set_progress,
+                     should_continue=lambda: not self.stop_event.is_set(),
+                     probe=self.probe,
+                     resolve=self.resolve,
+                     total=job.total)
+            status = "stopped" if self.stop_event.is_set() else "done"
+        except Exception as e:
+            self.log(f"خطا در اسکن {job.id}: {e}")
+            status = "error"
+        job.finish(status)
+        self.log(f"پایان اسکن {job.id}: {len(job.results)} IP فعال")
+
+    def _prune(self):
+        # باید با قفل گرفته‌شده فراخوانی شود
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and now - job.finished_at > self.retention:
+                del self.jobs[job_id]
+                if self.jobs_by_key.get(job.key) is job:
+                    del self.jobs_by_key[job.key]
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """مدیریت درخواست‌های HTTP سرویس اسکن"""
+
+    server_version = "IPScannerService/1.0"
+
+    def do_POST(self):
+        if self.path.rstrip('/') != "/scans":
+            return self._send_json(404, {"error": "مسیر نامعتبر"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("بدنه درخواست باید یک شیء JSON باشد")
+            targets = request.get("targets")
+            if not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+                raise ValueError("فیلد targets باید فهرست باشد")
+            job, coalesced, cached = self.server.service.submit(targets)
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(200, {"id": job.id, "coalesced": coalesced, "cached": cached})
+
+    def do_GET(self):
+        parts = [part for part in self.path.split('?', 1)[0].split('/') if part]
+        if len(parts) < 2 or parts[0] != "scans":
+            return self._send_json(404, {"error": "مسیر نامعتبر"})
+        job = self.server.service.get(parts[1])
+        if job is None:
+            return self._send_json(404, {"error": "اسکن یافت نشد"})
+
+        if len(parts) == 2:
+            return self._send_json(200, job.summary())
+        if len(parts) == 3 and parts[2] == "events":
+            return self._stream_events(job)
+        self._send_json(404, {"error": "مسیر نامعتبر"})
+
+    def log_message(self, format, *args):
+        # لاگ پیش‌فرض هر درخواست غیرفعال است
+        pass
+
+    def _stream_events(self, job):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for event in job.iter_events():
+                self.wfile.write((json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8'))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # کلاینت اتصال را بسته است
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class ScanServiceServer(ThreadingHTTPServer):
+    """سرور HTTP که یک ScanService را در دسترس کلاینت‌ها قرار می‌دهد"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    # صف پیش‌فرض (۵) برای اتصال هم‌زمان تعداد زیادی کلاینت کافی نیست
+    request_queue_size = 128
+
+    def __init__(self, service, host="127.0.0.1", port=DEFAULT_PORT):
+        super().__init__((host, port), _ServiceHandler)
+        self.service = service
+
+class ScanServiceClient:
+    """کلاینت ساده برای ارسال اسکن به سرویس و دریافت جریان نتایج"""
+
+    def __init__(self, base_url, timeout=10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def submit(self, targets):
+        """ارسال درخواست اسکن؛ خروجی دیکشنری شامل id است"""
+        body = json.dumps({"targets": list(targets)}).encode('utf-8')
+        request = urllib.request.Request(f"{self.base_url}/scans", data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def status(self, job_id):
+        """دریافت وضعیت و نتایج فعلی یک اسکن"""
+        with urllib.request.urlopen(f"{self.base_url}/scans/{job_id}", timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def events(self, job_id):
+        """تولید رویدادهای یک اسکن تا پایان آن"""
+        with urllib.request.urlopen(f"{self.base_url}/scans/{job_id}/events",
+                                    timeout=self.timeout) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="سرویس محلی اسکن شبکه IP")
+    parser.add_argument("--bind", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--cache-ttl", type=float, default=60.0,
+                        help="مدت اعتبار نتایج در حافظه نهان (ثانیه)")
+    parser.add_argument("--max-addresses", type=int, default=DEFAULT_MAX_ADDRESSES,
+                        help="بیشترین تعداد آدرس در یک درخواست اسکن")
+    args = parser.parse_args(argv)
+
+    service = ScanService(threads=args.threads, cache_ttl=args.cache_ttl,
+                          max_addresses=args.max_addresses)
+    server = ScanServiceServer(service, args.bind, args.port)
+    print(f"سرویس اسکن روی http://{args.bind}:{server.server_address[1]} آماده است")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("سرویس توسط کاربر متوقف شد")
+    finally:
+        service.shutdown()
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
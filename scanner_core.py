@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""هسته اسکن شبکه، مستقل از رابط گرافیکی
+
+این ماژول بدون نیاز به tkinter قابل استفاده است تا هم رابط گرافیکی و هم
+ابزارهای خط فرمان (مانند عامل‌های اسکن توزیع‌شده) از یک هسته مشترک استفاده کنند.
+"""
+
+import os
+import re
+import sys
+import socket
+import subprocess
+import ipaddress
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# مقدار نمایشی برای میزبان‌هایی که نامشان پیدا نشد
+UNKNOWN_HOSTNAME = "ناشناس"
+
+def get_local_ip():
+    """گرفتن آدرس IP لوکال دستگاه کاربر"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        local_ip = s.getsockname()[0]
+        s.close()
+        return local_ip
+    except Exception:
+        return None
+
+def ping_ip(ip):
+    """پینگ کردن یک آدرس IP برای بررسی فعال بودن آن"""
+    try:
+        if sys.platform.startswith('win'):
+            # دستور پینگ در ویندوز
+            output = subprocess.run(['ping', '-n', '1', '-w', '500', ip],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                text=True,
+                                timeout=1)
+        else:
+            # دستور پینگ در لینوکس/مک
+            output = subprocess.run(['ping', '-c', '1', '-W', '1', ip],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                text=True,
+                                timeout=1)
+
+        return output.returncode == 0
+    except (subprocess.SubprocessError, subprocess.TimeoutExpired, OSError):
+        return False
+
+def resolve_hostname(ip):
+    """پیدا کردن نام میزبان از روی آدرس IP"""
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (socket.herror, socket.gaierror):
+        return UNKNOWN_HOSTNAME
+
+_NEIGHBOUR_LINE = re.compile(
+    r"(\d{1,3}(?:\.\d{1,3}){3})\D.*?((?:[0-9A-Fa-f]{1,2}[:-]){5}[0-9A-Fa-f]{1,2})")
+
+def normalize_mac(mac):
+    """یکسان‌سازی قالب آدرس MAC به صورت AA:BB:CC:DD:EE:FF"""
+    return ':'.join(part.zfill(2) for part in re.split(r"[:-]", mac)).upper()
+
+def read_neighbour_table():
+    """خواندن جدول همسایه‌ها (ARP) سیستم عامل به صورت {ip: mac}"""
+    try:
+        if os.path.exists('/proc/net/arp'):
+            # لینوکس: خواندن مستقیم بدون اجرای برنامه خارجی
+            with open('/proc/net/arp') as f:
+                text = f.read()
+        else:
+            # ویندوز: arp -a؛ مک و سایر سیستم‌ها: arp -an تا برای هر ورودی جستجوی DNS معکوس انجام نشود
+            command = ['arp', '-a'] if sys.platform.startswith('win') else ['arp', '-an']
+            text = subprocess.run(command,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                text=True,
+                                timeout=5).stdout
+    except subprocess.TimeoutExpired as e:
+        # استفاده از بخشی از خروجی که تا پایان مهلت تولید شده است
+        text = e.stdout or ""
+        if isinstance(text, bytes):
+            text = text.decode(errors='replace')
+    except (OSError, subprocess.SubprocessError):
+        return {}
+
+    table = {}
+    for line in text.splitlines():
+        match = _NEIGHBOUR_LINE.search(line)
+        if not match:
+            continue
+        mac = normalize_mac(match.group(2))
+        # رد کردن ورودی‌های ناقص و broadcast
+        if mac in ("00:00:00:00:00:00", "FF:FF:FF:FF:FF:FF"):
+            continue
+        table[match.group(1)] = mac
+    return table
+
+def scan_host(ip, probe=ping_ip, resolve=resolve_hostname):
+    """اسکن یک آدرس IP؛ برای میزبان فعال (ip, hostname) و در غیر این صورت None"""
+    if not probe(ip):
+        return None
+    return ip, resolve(ip)
+
+def ip_range(first, last):
+    """تولید آدرس‌های IP از first تا last (هر دو شامل)"""
+    first = int(ipaddress.IPv4Address(first))
+    last = int(ipaddress.IPv4Address(last))
+    for value in range(first, last + 1):
+        yield str(ipaddress.IPv4Address(value))
+
+def parse_target(target):
+    """تبدیل یک هدف (CIDR، بازه a-b یا یک IP) به بازه عددی (first, last)"""
+    target = target.strip()
+    if '-' in target:
+        first, last = (int(ipaddress.IPv4Address(part.strip())) for part in target.split('-', 1))
+    elif '/' in target:
+        network = ipaddress.IPv4Network(target, strict=False)
+        first, last = int(network.network_address), int(network.broadcast_address)
+        # حذف آدرس شبکه و broadcast برای شبکه‌های بزرگ‌تر از /31
+        if network.prefixlen < 31:
+            first, last = first + 1, last - 1
+    else:
+        first = last = int(ipaddress.IPv4Address(target))
+
+    if first > last:
+        raise ValueError(f"بازه نامعتبر: {target}")
+    return first, last
+
+def merge_targets(targets):
+    """تبدیل فهرست هدف‌ها به بازه‌های عددی مرتب و بدون هم‌پوشانی"""
+    merged = []
+    for first, last in sorted(parse_target(target) for target in targets):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return [tuple(item) for item in merged]
+
+def scan_ips(ips, thread_count, on_result=None, on_progress=None,
+             should_continue=None, probe=ping_ip, resolve=resolve_hostname, total=None):
+    """اسکن فهرستی از آدرس‌ها با چند ترد
+
+    on_result(ip, hostname) برای هر میزبان فعال و on_progress(completed, total)
+    پس از اتمام هر آدرس فراخوانی می‌شود. اگر should_continue مقدار False برگرداند،
+    آدرس‌های باقی‌مانده اسکن نمی‌شوند. خروجی، فهرست (ip, hostname) میزبان‌های فعال است.
+
+    ips می‌تواند یک مولد (generator) باشد؛ در این صورت total را مشخص کنید. آدرس‌ها
+    به تدریج و در پنجره‌ای محدود به اجراکننده داده می‌شوند تا اسکن‌های بزرگ
+    همه آدرس‌ها را یک‌جا در حافظه نگه ندارند.
+    """
+    if total is None and hasattr(ips, '__len__'):
+        total = len(ips)
+    running = should_continue or (lambda: True)
+    thread_count = max(1, thread_count)
+    window = thread_count * 2
+    found = []
+
+    def scan_one(ip):
+        if not running():
+            return None
+        return scan_host(ip, probe, resolve)
+
+    completed = 0
+    addresses = iter(ips)
+    pending = set()
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        while True:
+            # پر کردن پنجره تا سقف مجاز
+            while len(pending) < window and running():
+                ip = next(addresses, None)
+                if ip is None:
+                    break
+                pending.add(executor.submit(scan_one, ip))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                completed += 1
+                if result is not None:
+                    found.append(result)
+                    if on_result:
+                        on_result(*result)
+                if on_progress:
+                    on_progress(completed, total)
+
+    return found